@@ -1,553 +1,1080 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from flask_mail import Mail, Message
-from werkzeug.security import generate_password_hash, check_password_hash
-import os
-from datetime import datetime, timedelta
-from sqlalchemy import inspect
-from apscheduler.schedulers.background import BackgroundScheduler
-import atexit
-
-app = Flask(__name__)
-
-# Configuration
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///studycloud.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Fix for Render's postgres:// URL
-if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
-    app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://', 1)
-
-# 📧 EMAIL CONFIGURATION (Gmail SMTP)
-app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
-app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
-app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_USERNAME')
-
-# Initialize extensions
-db = SQLAlchemy(app)
-login_manager = LoginManager(app)
-login_manager.login_view = 'auth'
-mail = Mail(app)
-
-# Models
-class User(UserMixin, db.Model):
-    __tablename__ = 'users'
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(100), unique=True, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(200), nullable=False)
-    tasks = db.relationship('Task', backref='owner', lazy=True, cascade='all, delete-orphan')
-    notifications = db.relationship('Notification', backref='user', lazy='dynamic', cascade='all, delete-orphan')
-    
-    # 🎮 GAMIFICATION FIELDS
-    points = db.Column(db.Integer, default=0)
-    level = db.Column(db.Integer, default=1)
-    badges = db.Column(db.String(500), default='')
-
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-    
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-    
-    # 🎮 GAMIFICATION METHODS
-    def add_points(self, points):
-        self.points += points
-        self.level = (self.points // 100) + 1
-        db.session.commit()
-    
-    def add_badge(self, badge_name):
-        badges_list = self.badges.split(',') if self.badges else []
-        if badge_name not in badges_list:
-            badges_list.append(badge_name)
-            self.badges = ','.join(badges_list)
-            db.session.commit()
-    
-    def get_badges(self):
-        return [b for b in self.badges.split(',') if b] if self.badges else []
-    
-    def points_to_next_level(self):
-        next_level_points = self.level * 100
-        return next_level_points - self.points
-    
-    # 🔔 NOTIFICATION METHODS
-    def unread_notification_count(self):
-        return self.notifications.filter_by(read=False).count()
-
-class Task(db.Model):
-    __tablename__ = 'tasks'
-    id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text)
-    status = db.Column(db.String(20), default='incomplete')
-    priority = db.Column(db.String(20), default='medium')
-    due_date = db.Column(db.DateTime, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    
-    # 🔔 NOTIFICATION TRACKING
-    notified_1day = db.Column(db.Boolean, default=False)
-    notified_1hour = db.Column(db.Boolean, default=False)
-    notified_10min = db.Column(db.Boolean, default=False)
-
-class Notification(db.Model):
-    __tablename__ = 'notifications'
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=True)
-    message = db.Column(db.String(500), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    read = db.Column(db.Boolean, default=False)
-
-# Database setup with migration
-with app.app_context():
-    try:
-        inspector = inspect(db.engine)
-        
-        if inspector.has_table('tasks'):
-            columns = [column['name'] for column in inspector.get_columns('tasks')]
-            if 'due_date' not in columns:
-                print('⚠️ Migrating database: Adding due_date column...')
-                with db.engine.connect() as conn:
-                    try:
-                        conn.execute(db.text('ALTER TABLE tasks ADD COLUMN due_date TIMESTAMP'))
-                        conn.commit()
-                        print('✅ Database migration successful!')
-                    except Exception as e:
-                        print(f'❌ Migration error: {e}')
-            
-            # Add notification tracking columns
-            if 'notified_1day' not in columns:
-                with db.engine.connect() as conn:
-                    conn.execute(db.text('ALTER TABLE tasks ADD COLUMN notified_1day BOOLEAN DEFAULT FALSE'))
-                    conn.execute(db.text('ALTER TABLE tasks ADD COLUMN notified_1hour BOOLEAN DEFAULT FALSE'))
-                    conn.execute(db.text('ALTER TABLE tasks ADD COLUMN notified_10min BOOLEAN DEFAULT FALSE'))
-                    conn.commit()
-                    print('✅ Notification tracking columns added!')
-        
-        # 🎮 ADD GAMIFICATION COLUMNS
-        if inspector.has_table('users'):
-            user_columns = [column['name'] for column in inspector.get_columns('users')]
-            if 'points' not in user_columns:
-                with db.engine.connect() as conn:
-                    conn.execute(db.text("ALTER TABLE users ADD COLUMN points INTEGER DEFAULT 0"))
-                    conn.execute(db.text("ALTER TABLE users ADD COLUMN level INTEGER DEFAULT 1"))
-                    conn.execute(db.text("ALTER TABLE users ADD COLUMN badges VARCHAR(500) DEFAULT ''"))
-                    conn.commit()
-                    print('✅ Gamification columns added!')
-        
-        db.create_all()
-        print('✅ Database tables ready!')
-    except Exception as e:
-        print(f'Database setup: {e}')
-        db.create_all()
-
-# 📧 EMAIL NOTIFICATION FUNCTION
-def send_email_notification(user_email, task_title, time_left):
-    try:
-        msg = Message(
-            subject=f'⏰ Task Reminder: {task_title}',
-            recipients=[user_email]
-        )
-        msg.body = f"""
-Hello!
-
-This is a reminder that your task is due soon:
-
-📋 Task: {task_title}
-⏰ Time Left: {time_left}
-
-Don't forget to complete it on time!
-
-Best regards,
-StudyCloud Team
-        """
-        msg.html = f"""
-<html>
-<body style="font-family: Arial, sans-serif; background-color: #f4f4f4; padding: 20px;">
-    <div style="max-width: 600px; margin: 0 auto; background: white; border-radius: 10px; padding: 30px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
-        <h2 style="color: #6366f1; margin-bottom: 20px;">⏰ Task Reminder</h2>
-        <p style="font-size: 16px; color: #333; line-height: 1.6;">Hello!</p>
-        <p style="font-size: 16px; color: #333; line-height: 1.6;">This is a reminder that your task is due soon:</p>
-        
-        <div style="background: linear-gradient(135deg, #6366f1, #a855f7); padding: 20px; border-radius: 8px; margin: 20px 0;">
-            <p style="color: white; margin: 0; font-size: 14px;">📋 <strong>Task:</strong></p>
-            <p style="color: white; margin: 5px 0 15px 0; font-size: 18px; font-weight: bold;">{task_title}</p>
-            <p style="color: white; margin: 0; font-size: 14px;">⏰ <strong>Time Left:</strong></p>
-            <p style="color: white; margin: 5px 0 0 0; font-size: 18px; font-weight: bold;">{time_left}</p>
-        </div>
-        
-        <p style="font-size: 16px; color: #333; line-height: 1.6;">Don't forget to complete it on time!</p>
-        
-        <hr style="border: none; border-top: 1px solid #eee; margin: 30px 0;">
-        
-        <p style="font-size: 14px; color: #999; text-align: center;">Best regards,<br><strong>StudyCloud Team</strong></p>
-    </div>
-</body>
-</html>
-        """
-        mail.send(msg)
-        print(f'✅ Email sent to {user_email} for task: {task_title}')
-        return True
-    except Exception as e:
-        print(f'❌ Email send error: {e}')
-        return False
-
-# 🔔 CHECK TASKS AND SEND NOTIFICATIONS
-def check_task_notifications():
-    try:
-        with app.app_context():
-            print('🔍 Checking for task notifications...')
-            now = datetime.utcnow()
-            
-            tasks = Task.query.filter(
-                Task.status == 'incomplete',
-                Task.due_date.isnot(None)
-            ).all()
-            
-            for task in tasks:
-                try:
-                    user = User.query.get(task.user_id)
-                    if not user:
-                        continue
-                    
-                    time_until_due = task.due_date - now
-                    
-                    # 1 DAY BEFORE (24 hours)
-                    if not task.notified_1day and timedelta(hours=23, minutes=50) <= time_until_due <= timedelta(hours=24, minutes=10):
-                        send_email_notification(user.email, task.title, "1 day")
-                        notif = Notification(
-                            user_id=user.id,
-                            task_id=task.id,
-                            message=f"📋 Task '{task.title}' is due in 1 day!"
-                        )
-                        db.session.add(notif)
-                        task.notified_1day = True
-                        print(f'📧 1 day notification sent for: {task.title}')
-                    
-                    # 1 HOUR BEFORE
-                    elif not task.notified_1hour and timedelta(minutes=50) <= time_until_due <= timedelta(hours=1, minutes=10):
-                        send_email_notification(user.email, task.title, "1 hour")
-                        notif = Notification(
-                            user_id=user.id,
-                            task_id=task.id,
-                            message=f"⚠️ Task '{task.title}' is due in 1 hour!"
-                        )
-                        db.session.add(notif)
-                        task.notified_1hour = True
-                        print(f'📧 1 hour notification sent for: {task.title}')
-                    
-                    # 10 MINUTES BEFORE
-                    elif not task.notified_10min and timedelta(minutes=5) <= time_until_due <= timedelta(minutes=15):
-                        send_email_notification(user.email, task.title, "10 minutes")
-                        notif = Notification(
-                            user_id=user.id,
-                            task_id=task.id,
-                            message=f"🚨 Task '{task.title}' is due in 10 minutes!"
-                        )
-                        db.session.add(notif)
-                        task.notified_10min = True
-                        print(f'📧 10 min notification sent for: {task.title}')
-                    
-                    db.session.commit()
-                except Exception as e:
-                    print(f'❌ Error processing task {task.id}: {e}')
-                    db.session.rollback()
-                    continue
-                    
-    except Exception as e:
-        print(f'❌ Scheduler error: {e}')
-
-# 🕐 SCHEDULER - Run every 5 minutes
-scheduler = BackgroundScheduler()
-scheduler.add_job(func=check_task_notifications, trigger="interval", minutes=5)
-scheduler.start()
-
-# Shut down the scheduler when exiting the app
-atexit.register(lambda: scheduler.shutdown())
-
-@login_manager.user_loader
-def load_user(user_id):
-    try:
-        return db.session.get(User, int(user_id))
-    except:
-        return None
-
-# Health check (REQUIRED FOR RENDER)
-@app.route('/health')
-def health():
-    return jsonify({"status": "ok"}), 200
-
-# Routes
-@app.route('/')
-def index():
-    if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
-    return redirect(url_for('auth'))
-
-@app.route('/auth')
-def auth():
-    if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
-    return render_template('auth.html')
-
-@app.route('/register', methods=['POST'])
-def register():
-    username = request.form.get('username')
-    email = request.form.get('email')
-    password = request.form.get('password')
-    
-    if User.query.filter_by(username=username).first():
-        flash('Username already exists!', 'danger')
-        return redirect(url_for('auth'))
-    
-    if User.query.filter_by(email=email).first():
-        flash('Email already registered!', 'danger')
-        return redirect(url_for('auth'))
-    
-    user = User(username=username, email=email, points=0, level=1, badges='')
-    user.set_password(password)
-    db.session.add(user)
-    db.session.commit()
-    
-    flash('Registration successful! Please login.', 'success')
-    return redirect(url_for('auth'))
-
-@app.route('/login', methods=['POST'])
-def login():
-    username = request.form.get('username')
-    password = request.form.get('password')
-    
-    user = User.query.filter_by(username=username).first()
-    
-    if user and user.check_password(password):
-        login_user(user)
-        return redirect(url_for('dashboard'))
-    else:
-        flash('Invalid username or password!', 'danger')
-        return redirect(url_for('auth'))
-
-@app.route('/dashboard')
-@login_required
-def dashboard():
-    filter_status = request.args.get('status', 'all')
-    filter_priority = request.args.get('priority', 'all')
-    
-    query = Task.query.filter_by(user_id=current_user.id)
-    
-    if filter_status != 'all':
-        query = query.filter_by(status=filter_status)
-    
-    if filter_priority != 'all':
-        query = query.filter_by(priority=filter_priority)
-    
-    tasks = query.order_by(Task.created_at.desc()).all()
-    
-    all_count = Task.query.filter_by(user_id=current_user.id).count()
-    complete_count = Task.query.filter_by(user_id=current_user.id, status='complete').count()
-    incomplete_count = Task.query.filter_by(user_id=current_user.id, status='incomplete').count()
-    
-    user_badges = current_user.get_badges()
-    
-    return render_template('dashboard.html', 
-                         tasks=tasks,
-                         filter_status=filter_status,
-                         filter_priority=filter_priority,
-                         all_count=all_count,
-                         complete_count=complete_count,
-                         incomplete_count=incomplete_count,
-                         user_badges=user_badges)
-
-@app.route('/add_task', methods=['POST'])
-@login_required
-def add_task():
-    title = request.form.get('title')
-    description = request.form.get('description')
-    priority = request.form.get('priority', 'medium')
-    due_date_str = request.form.get('due_date')
-    
-    # Parse due date - NOW SUPPORTS TIME!
-    due_date = None
-    if due_date_str:
-        try:
-            # Try datetime format first (with time)
-            due_date = datetime.strptime(due_date_str, '%Y-%m-%dT%H:%M')
-        except:
-            try:
-                # Fallback to date only
-                due_date = datetime.strptime(due_date_str, '%Y-%m-%d')
-            except:
-                pass
-    
-    task = Task(title=title, description=description, priority=priority, due_date=due_date, user_id=current_user.id)
-    db.session.add(task)
-    db.session.commit()
-    
-    flash('Task added successfully!', 'success')
-    return redirect(url_for('dashboard'))
-
-@app.route('/toggle_task/<int:task_id>')
-@login_required
-def toggle_task(task_id):
-    task = Task.query.get_or_404(task_id)
-    
-    if task.user_id != current_user.id:
-        flash('Unauthorized action!', 'danger')
-        return redirect(url_for('dashboard'))
-    
-    if task.status == 'incomplete':
-        task.status = 'complete'
-        
-        if task.priority == 'high':
-            points = 30
-            flash('🎉 Task completed! +30 points (High Priority)', 'success')
-        elif task.priority == 'medium':
-            points = 20
-            flash('🎉 Task completed! +20 points (Medium Priority)', 'success')
-        else:
-            points = 10
-            flash('🎉 Task completed! +10 points (Low Priority)', 'success')
-        
-        current_user.add_points(points)
-        
-        completed_tasks = Task.query.filter_by(user_id=current_user.id, status='complete').count()
-        
-        if completed_tasks == 1:
-            current_user.add_badge('First Step')
-            flash('🏆 New Badge: First Step!', 'success')
-        elif completed_tasks == 10:
-            current_user.add_badge('Task Master')
-            flash('🏆 New Badge: Task Master!', 'success')
-        elif completed_tasks == 50:
-            current_user.add_badge('Productivity Legend')
-            flash('🏆 New Badge: Productivity Legend!', 'success')
-        elif completed_tasks == 100:
-            current_user.add_badge('Century Club')
-            flash('🏆 New Badge: Century Club!', 'success')
-    else:
-        task.status = 'incomplete'
-        flash('Task marked as incomplete.', 'info')
-    
-    db.session.commit()
-    return redirect(url_for('dashboard'))
-
-@app.route('/delete_task/<int:task_id>')
-@login_required
-def delete_task(task_id):
-    task = Task.query.get_or_404(task_id)
-    
-    if task.user_id != current_user.id:
-        flash('Unauthorized action!', 'danger')
-        return redirect(url_for('dashboard'))
-    
-    db.session.delete(task)
-    db.session.commit()
-    
-    flash('Task deleted successfully!', 'success')
-    return redirect(url_for('dashboard'))
-
-# 🔔 NOTIFICATION ROUTES
-@app.route('/notifications')
-@login_required
-def notifications():
-    notifs = current_user.notifications.order_by(Notification.timestamp.desc()).all()
-    return render_template('notifications.html', notifications=notifs)
-
-@app.route('/api/notifications/count')
-@login_required
-def notification_count():
-    count = current_user.unread_notification_count()
-    return jsonify({'count': count})
-
-@app.route('/api/notifications/recent')
-@login_required
-def recent_notifications():
-    notifs = current_user.notifications.order_by(Notification.timestamp.desc()).limit(5).all()
-    return jsonify({
-        'notifications': [{
-            'id': n.id,
-            'message': n.message,
-            'timestamp': n.timestamp.strftime('%Y-%m-%d %H:%M'),
-            'read': n.read
-        } for n in notifs]
-    })
-
-@app.route('/notifications/mark_read/<int:notif_id>')
-@login_required
-def mark_notification_read(notif_id):
-    notif = Notification.query.get_or_404(notif_id)
-    if notif.user_id == current_user.id:
-        notif.read = True
-        db.session.commit()
-    return redirect(url_for('notifications'))
-
-@app.route('/notifications/mark_all_read')
-@login_required
-def mark_all_read():
-    current_user.notifications.filter_by(read=False).update({'read': True})
-    db.session.commit()
-    return redirect(url_for('notifications'))
-
-@app.route('/analytics')
-@login_required
-def analytics():
-    tasks = Task.query.filter_by(user_id=current_user.id).all()
-    
-    total_tasks = len(tasks)
-    completed = len([t for t in tasks if t.status == 'complete'])
-    incomplete = len([t for t in tasks if t.status == 'incomplete'])
-    
-    high_priority = len([t for t in tasks if t.priority == 'high'])
-    medium_priority = len([t for t in tasks if t.priority == 'medium'])
-    low_priority = len([t for t in tasks if t.priority == 'low'])
-    
-    now = datetime.utcnow()
-    overdue = len([t for t in tasks if t.due_date and t.due_date < now and t.status == 'incomplete'])
-    
-    user_badges = current_user.get_badges()
-    
-    return render_template('analytics.html',
-                         total_tasks=total_tasks,
-                         completed=completed,
-                         incomplete=incomplete,
-                         high_priority=high_priority,
-                         medium_priority=medium_priority,
-                         low_priority=low_priority,
-                         overdue=overdue,
-                         tasks=tasks,
-                         user_badges=user_badges)
-
-@app.route('/admin')
-@login_required
-def admin():
-    if current_user.username != 'admin':
-        flash('Access denied! Admin only.', 'danger')
-        return redirect(url_for('dashboard'))
-    
-    users = User.query.all()
-    tasks = Task.query.all()
-    
-    total_users = len(users)
-    total_tasks = len(tasks)
-    completed_tasks = Task.query.filter_by(status='complete').count()
-    
-    return render_template('admin.html', 
-                         users=users, 
-                         tasks=tasks,
-                         total_users=total_users,
-                         total_tasks=total_tasks,
-                         completed_tasks=completed_tasks)
-
-@app.route('/logout')
-@login_required
-def logout():
-    logout_user()
-    return redirect(url_for('auth'))
-
-if __name__ == '__main__':
-    app.run(debug=True)
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, g, session, make_response, Response, abort, has_request_context
+from flask.json.provider import JSONProvider
+import hashlib
+import hmac
+import orjson
+import smtplib
+from flask_sqlalchemy import SQLAlchemy
+from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
+from flask_mail import Mail, Message
+from flask_caching import Cache
+from flask_migrate import Migrate
+from flask_wtf import CSRFProtect
+from flask_compress import Compress
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import inspect, func, case, event, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload, joinedload, load_only
+from apscheduler.schedulers.background import BackgroundScheduler
+from concurrent.futures import ThreadPoolExecutor
+from jinja2 import FileSystemBytecodeCache
+import atexit
+import tempfile
+
+class ORJSONProvider(JSONProvider):
+    """Route all jsonify/get_json traffic through orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+app = Flask(__name__)
+app.json = ORJSONProvider(app)
+
+# Configuration
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///studycloud.db')
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Larger compiled-SQL cache so the hot per-request statements stay compiled
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'query_cache_size': 1200}
+if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    # Managed Postgres drops idle connections; pre-ping and recycle catch
+    # stale ones before a request trips over them
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update({
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+        'pool_size': 10,
+        'max_overflow': 5,
+        'pool_timeout': 20,
+        # Batch multi-row UPDATE/DELETE round trips too (INSERTs already
+        # use psycopg2's VALUES rewriting by default)
+        'executemany_mode': 'values_plus_batch',
+    })
+
+# Fix for Render's postgres:// URL
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
+    app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://', 1)
+
+# 📧 EMAIL CONFIGURATION (Gmail SMTP)
+app.config['MAIL_SERVER'] = 'smtp.gmail.com'
+app.config['MAIL_PORT'] = 587
+app.config['MAIL_USE_TLS'] = True
+app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
+app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_USERNAME')
+
+# Initialize extensions
+db = SQLAlchemy(app)
+login_manager = LoginManager(app)
+login_manager.login_view = 'auth'
+mail = Mail(app)
+cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 300})
+# Alembic migrations: run `flask db upgrade` as the deploy release command so
+# schema changes happen once per deploy, not once per worker boot
+migrate = Migrate(app, db)
+# All mutating routes are POST-only; every form carries a csrf_token
+csrf = CSRFProtect(app)
+# Compress the big HTML table pages (brotli preferred, gzip fallback)
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+Compress(app)
+
+# Persist compiled Jinja bytecode to disk so freshly spawned workers reuse
+# it instead of re-parsing every template on their first render
+_jinja_cache_dir = os.path.join(tempfile.gettempdir(), 'studycloud_jinja_cache')
+os.makedirs(_jinja_cache_dir, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory=_jinja_cache_dir)
+
+# 🔐 PASSWORD HASHING (Argon2id, 64 MiB / 3 passes)
+# Hash work runs on a small thread pool: argon2-cffi releases the GIL, so
+# gevent/gthread workers keep serving other requests during the ~100ms hash
+password_hasher = PasswordHasher(time_cost=3, memory_cost=64 * 1024, parallelism=1)
+hash_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2)
+# Verified against when a login hits an unknown username, so that branch
+# costs the same as a wrong password (no user-enumeration timing oracle)
+_DUMMY_HASH = password_hasher.hash('not-a-real-password')
+
+def _verify_password(stored_hash, password):
+    """Check a password against a stored hash without needing a User object.
+
+    Returns (ok, upgraded_hash); upgraded_hash is set when the stored hash
+    should be replaced (legacy werkzeug scheme or outdated argon2 params).
+    """
+    if not stored_hash.startswith('$argon2'):
+        if check_password_hash(stored_hash, password):
+            return True, password_hasher.hash(password)
+        return False, None
+    try:
+        password_hasher.verify(stored_hash, password)
+    except (VerifyMismatchError, InvalidHashError):
+        return False, None
+    if password_hasher.check_needs_rehash(stored_hash):
+        return True, password_hasher.hash(password)
+    return True, None
+
+# 🎮 GAMIFICATION TABLES (points per completed priority, badge milestones)
+PRIORITY_POINTS = {
+    'high': (30, '🎉 Task completed! +30 points (High Priority)'),
+    'medium': (20, '🎉 Task completed! +20 points (Medium Priority)'),
+    'low': (10, '🎉 Task completed! +10 points (Low Priority)'),
+}
+BADGE_THRESHOLDS = {
+    1: 'First Step',
+    10: 'Task Master',
+    50: 'Productivity Legend',
+    100: 'Century Club',
+}
+
+# Models
+# 🏆 BADGES (normalized: one row per badge, association table per award)
+user_badges = db.Table(
+    'user_badges',
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
+    db.Column('badge_id', db.Integer, db.ForeignKey('badges.id'), primary_key=True)
+)
+
+class Badge(db.Model):
+    __tablename__ = 'badges'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+
+class User(UserMixin, db.Model):
+    __tablename__ = 'users'
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(100), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(200), nullable=False)
+    # lazy='raise': any stray user.tasks access without an explicit eager
+    # load is a hard error instead of a silent unbounded SELECT
+    tasks = db.relationship('Task', back_populates='owner', lazy='raise', cascade='all, delete-orphan')
+    notifications = db.relationship('Notification', backref='user', cascade='all, delete-orphan')
+    
+    # 🎮 GAMIFICATION FIELDS
+    points = db.Column(db.Integer, default=0)
+    level = db.Column(db.Integer, default=1)
+    # Denormalized count of completed tasks, maintained by toggle_task and
+    # delete_task, so badge thresholds don't need a COUNT on the write path
+    completed_count = db.Column(db.Integer, default=0)
+    badges = db.relationship('Badge', secondary=user_badges, lazy='selectin')
+
+    def set_password(self, password):
+        self.password_hash = password_hasher.hash(password)
+
+    def check_password(self, password):
+        # Legacy werkzeug hashes (pbkdf2:/scrypt: prefixed) are verified the
+        # old way and upgraded to Argon2id for the next login
+        ok, upgraded_hash = _verify_password(self.password_hash, password)
+        if upgraded_hash is not None:
+            self.password_hash = upgraded_hash
+        return ok
+    
+    # 🎮 GAMIFICATION METHODS
+    # These only mutate the instance; the calling route owns the commit so
+    # a task completion is one transaction instead of three
+    def add_points(self, points):
+        self.points += points
+        # Only touch level when it actually changes so dirty tracking can
+        # keep the common small-award UPDATE narrow
+        new_level = (self.points // 100) + 1
+        if new_level != self.level:
+            self.level = new_level
+
+    def add_badge(self, badge_name):
+        if badge_name not in (badge.name for badge in self.badges):
+            badge = Badge.query.filter_by(name=badge_name).first()
+            if badge is None:
+                badge = Badge(name=badge_name)
+                db.session.add(badge)
+            self.badges.append(badge)
+
+    def get_badges(self):
+        return [badge.name for badge in self.badges]
+    
+    def points_to_next_level(self):
+        next_level_points = self.level * 100
+        return next_level_points - self.points
+    
+    # 🔔 NOTIFICATION METHODS
+    def unread_notification_count(self):
+        return db.session.scalar(
+            db.select(func.count(Notification.id))
+            .where(Notification.user_id == self.id, Notification.read.is_(False)))
+
+class Task(db.Model):
+    __tablename__ = 'tasks'
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    status = db.Column(db.String(20), default='incomplete')
+    priority = db.Column(db.String(20), default='medium')
+    due_date = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    owner = db.relationship('User', back_populates='tasks')
+
+    # 🔔 NOTIFICATION TRACKING
+    notified_1day = db.Column(db.Boolean, default=False)
+    notified_1hour = db.Column(db.Boolean, default=False)
+    notified_10min = db.Column(db.Boolean, default=False)
+
+    # Covering indexes for the dashboard/analytics filters (user + status/
+    # priority, ordered by created_at)
+    __table_args__ = (
+        db.Index('ix_tasks_user_status_prio_created', 'user_id', 'status', 'priority', 'created_at'),
+        db.Index('ix_tasks_user_priority', 'user_id', 'priority'),
+        db.Index('ix_tasks_user_created', 'user_id', 'created_at'),
+        # Status-only filter ordered by created_at (priority = all), which
+        # the four-column index above can't serve in index order
+        db.Index('ix_tasks_user_status_created', 'user_id', 'status', 'created_at'),
+        # Partial index over just the open tasks for due-date/overdue scans
+        db.Index('ix_tasks_user_due_incomplete', 'user_id', 'due_date',
+                 postgresql_where=db.text("status = 'incomplete'"),
+                 sqlite_where=db.text("status = 'incomplete'")),
+        # Cross-user scan for the notification scheduler's due windows
+        db.Index('ix_tasks_status_due', 'status', 'due_date'),
+    )
+
+class Notification(db.Model):
+    __tablename__ = 'notifications'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=True, index=True)
+    message = db.Column(db.String(500), nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    read = db.Column(db.Boolean, default=False)
+
+    __table_args__ = (
+        # The unread-count poll runs constantly; keep it O(unread) with a
+        # partial index, plus a plain composite for engines without one
+        db.Index('ix_notif_user_read', 'user_id', 'read'),
+        db.Index('ix_notif_user_unread', 'user_id',
+                 postgresql_where=db.text('read = false'),
+                 sqlite_where=db.text('read = 0')),
+    )
+
+# Statements for the per-request hot paths, built once at import time and
+# executed with bound parameters
+STMT_DASH_STATE = (
+    db.select(func.max(Task.updated_at), func.count(Task.id),
+              func.count(case((Task.status == 'complete', 1))))
+    .where(Task.user_id == bindparam('uid'))
+)
+STMT_RECENT_NOTIFICATIONS = (
+    db.select(Notification.id, Notification.message, Notification.timestamp, Notification.read)
+    .where(Notification.user_id == bindparam('uid'))
+    .order_by(Notification.timestamp.desc())
+    .limit(5)
+)
+
+# The dashboard filter space is a small closed set, so specialize one
+# statement per (status, priority) combination up front — no per-request
+# query building and every request hits the compiled-SQL cache
+def _dash_stmt(status, priority):
+    stmt = (
+        db.select(Task)
+        # Only the columns the cards render; the notified_*/updated_at
+        # bookkeeping columns stay on the server
+        .options(load_only(
+            Task.title, Task.description, Task.status, Task.priority,
+            Task.due_date, Task.created_at,
+        ))
+        .where(Task.user_id == bindparam('uid'))
+    )
+    if status != 'all':
+        stmt = stmt.where(Task.status == status)
+    if priority != 'all':
+        stmt = stmt.where(Task.priority == priority)
+    return stmt.order_by(Task.created_at.desc())
+
+DASH_STMTS = {
+    (status, priority): _dash_stmt(status, priority)
+    for status in ('all', 'complete', 'incomplete')
+    for priority in ('all', 'high', 'medium', 'low')
+}
+
+# Legacy in-app migration for databases that predate Alembic. Run once per
+# deploy with RUN_MIGRATIONS=1 instead of on every worker boot — steady-state
+# startup skips all of the schema inspection and DDL below. New schema changes
+# should go through `flask db migrate` / `flask db upgrade`.
+
+# Bump whenever run_migrations gains new DDL; a matching meta row lets a boot
+# skip all the information_schema inspection with one cheap SELECT
+SCHEMA_VERSION = 4
+
+def run_migrations():
+    try:
+        inspector = inspect(db.engine)
+
+        if inspector.has_table('meta'):
+            with db.engine.connect() as conn:
+                if conn.execute(db.text('SELECT version FROM meta')).scalar() == SCHEMA_VERSION:
+                    print('✅ Schema up to date, migration skipped')
+                    return
+
+        # Collect every missing column first, then apply all ALTERs in one
+        # transaction (one commit/fsync instead of one per connect block).
+        # Postgres additionally accepts several ADD COLUMNs in one ALTER
+        # statement; SQLite needs one statement per column.
+        statements = []
+        is_postgres = db.engine.url.drivername.startswith('postgresql')
+
+        def add_columns(table, column_defs):
+            if is_postgres:
+                statements.append(
+                    f'ALTER TABLE {table} ' + ', '.join(f'ADD COLUMN {c}' for c in column_defs))
+            else:
+                statements.extend(f'ALTER TABLE {table} ADD COLUMN {c}' for c in column_defs)
+
+        if inspector.has_table('tasks'):
+            columns = [column['name'] for column in inspector.get_columns('tasks')]
+            if 'due_date' not in columns:
+                print('⚠️ Migrating database: Adding due_date column...')
+                add_columns('tasks', ['due_date TIMESTAMP'])
+            if 'updated_at' not in columns:
+                add_columns('tasks', ['updated_at TIMESTAMP'])
+
+            # Add notification tracking columns
+            if 'notified_1day' not in columns:
+                add_columns('tasks', [
+                    'notified_1day BOOLEAN DEFAULT FALSE',
+                    'notified_1hour BOOLEAN DEFAULT FALSE',
+                    'notified_10min BOOLEAN DEFAULT FALSE',
+                ])
+
+        # 🎮 ADD GAMIFICATION COLUMNS
+        if inspector.has_table('users'):
+            user_columns = [column['name'] for column in inspector.get_columns('users')]
+            if 'points' not in user_columns:
+                add_columns('users', ['points INTEGER DEFAULT 0', 'level INTEGER DEFAULT 1'])
+            if 'completed_count' not in user_columns:
+                add_columns('users', ['completed_count INTEGER DEFAULT 0'])
+                backfill_completed_count = True
+            else:
+                backfill_completed_count = False
+            legacy_badges_column = 'badges' in user_columns
+        else:
+            legacy_badges_column = False
+            backfill_completed_count = False
+
+        if statements:
+            with db.engine.begin() as conn:
+                for statement in statements:
+                    conn.execute(db.text(statement))
+            print(f'✅ Database migration successful! ({len(statements)} statements)')
+
+        db.create_all()
+
+        # Seed the denormalized completed counter from the real counts once
+        if backfill_completed_count:
+            with db.engine.begin() as conn:
+                conn.execute(db.text(
+                    'UPDATE users SET completed_count = ('
+                    'SELECT COUNT(*) FROM tasks '
+                    "WHERE tasks.user_id = users.id AND tasks.status = 'complete')"))
+            print('✅ completed_count backfilled!')
+
+        # create_all only creates missing tables, so make sure existing
+        # databases pick up the task indexes too
+        with db.engine.begin() as conn:
+            conn.execute(db.text(
+                'CREATE INDEX IF NOT EXISTS ix_tasks_user_status_prio_created '
+                'ON tasks (user_id, status, priority, created_at)'))
+            conn.execute(db.text(
+                'CREATE INDEX IF NOT EXISTS ix_tasks_user_priority ON tasks (user_id, priority)'))
+            conn.execute(db.text(
+                'CREATE INDEX IF NOT EXISTS ix_tasks_user_created ON tasks (user_id, created_at)'))
+            conn.execute(db.text(
+                'CREATE INDEX IF NOT EXISTS ix_tasks_user_status_created '
+                'ON tasks (user_id, status, created_at)'))
+            conn.execute(db.text(
+                'CREATE INDEX IF NOT EXISTS ix_tasks_user_due_incomplete '
+                "ON tasks (user_id, due_date) WHERE status = 'incomplete'"))
+            conn.execute(db.text(
+                'CREATE INDEX IF NOT EXISTS ix_tasks_status_due ON tasks (status, due_date)'))
+            conn.execute(db.text(
+                'CREATE INDEX IF NOT EXISTS ix_notif_user_read ON notifications (user_id, read)'))
+            conn.execute(db.text(
+                'CREATE INDEX IF NOT EXISTS ix_notifications_task_id ON notifications (task_id)'))
+            unread_literal = 'false' if is_postgres else '0'
+            conn.execute(db.text(
+                'CREATE INDEX IF NOT EXISTS ix_notif_user_unread '
+                f'ON notifications (user_id) WHERE read = {unread_literal}'))
+
+        # 🏆 One-shot migration: split the legacy CSV badges column into
+        # badge/user_badges rows, then drop the old column
+        if legacy_badges_column:
+            with db.engine.begin() as conn:
+                rows = conn.execute(db.text(
+                    "SELECT id, badges FROM users WHERE badges IS NOT NULL AND badges != ''"
+                )).all()
+                for user_id, badges_csv in rows:
+                    for name in badges_csv.split(','):
+                        if not name:
+                            continue
+                        badge_id = conn.execute(
+                            db.text("SELECT id FROM badges WHERE name = :name"),
+                            {'name': name}
+                        ).scalar()
+                        if badge_id is None:
+                            conn.execute(db.text("INSERT INTO badges (name) VALUES (:name)"), {'name': name})
+                            badge_id = conn.execute(
+                                db.text("SELECT id FROM badges WHERE name = :name"),
+                                {'name': name}
+                            ).scalar()
+                        conn.execute(
+                            db.text("INSERT INTO user_badges (user_id, badge_id) VALUES (:u, :b)"),
+                            {'u': user_id, 'b': badge_id}
+                        )
+                conn.execute(db.text('ALTER TABLE users DROP COLUMN badges'))
+            print('✅ Legacy badges column migrated!')
+
+        with db.engine.begin() as conn:
+            conn.execute(db.text('CREATE TABLE IF NOT EXISTS meta (version INTEGER NOT NULL)'))
+            conn.execute(db.text('DELETE FROM meta'))
+            conn.execute(db.text('INSERT INTO meta (version) VALUES (:v)'), {'v': SCHEMA_VERSION})
+
+        print('✅ Database tables ready!')
+    except Exception as e:
+        print(f'Database setup: {e}')
+        db.create_all()
+
+# ⚡ SQLite tuning: WAL journaling with NORMAL sync means a commit appends to
+# the WAL instead of fsyncing the main database file; bigger page cache and
+# mmap keep the hot indexes in memory
+def _set_sqlite_pragmas(dbapi_conn, _connection_record):
+    cursor = dbapi_conn.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA cache_size=-20000')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.close()
+
+with app.app_context():
+    if db.engine.url.drivername.startswith('sqlite'):
+        event.listens_for(db.engine, 'connect')(_set_sqlite_pragmas)
+
+    if os.environ.get('RUN_MIGRATIONS') == '1':
+        run_migrations()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the database schema on a fresh database (run once per deploy)."""
+    db.create_all()
+    print('✅ Database schema created')
+
+# 🔎 Per-request SQL query counter — a dev guardrail that surfaces N+1
+# regressions as an X-SQL-Query-Count header and a warning above budget.
+# Off (and zero-cost) unless debugging or explicitly enabled.
+if app.debug or os.environ.get('SQL_QUERY_COUNT_ENABLED') == '1':
+    def _count_sql(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g.sql_count = g.get('sql_count', 0) + 1
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _count_sql)
+
+    @app.after_request
+    def _report_sql_count(response):
+        count = g.get('sql_count', 0)
+        response.headers['X-SQL-Query-Count'] = str(count)
+        if count > 10:
+            app.logger.warning('%s %s issued %d SQL queries',
+                               request.method, request.path, count)
+        return response
+
+# 📧 EMAIL TEMPLATES
+# Compiled once at import; per-send cost is just rendering the two variables
+_EMAIL_TEXT_TMPL = app.jinja_env.from_string("""
+Hello!
+
+This is a reminder that your task is due soon:
+
+📋 Task: {{ task_title }}
+⏰ Time Left: {{ time_left }}
+
+Don't forget to complete it on time!
+
+Best regards,
+StudyCloud Team
+        """)
+_EMAIL_HTML_TMPL = app.jinja_env.from_string("""
+<html>
+<body style="font-family: Arial, sans-serif; background-color: #f4f4f4; padding: 20px;">
+    <div style="max-width: 600px; margin: 0 auto; background: white; border-radius: 10px; padding: 30px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
+        <h2 style="color: #6366f1; margin-bottom: 20px;">⏰ Task Reminder</h2>
+        <p style="font-size: 16px; color: #333; line-height: 1.6;">Hello!</p>
+        <p style="font-size: 16px; color: #333; line-height: 1.6;">This is a reminder that your task is due soon:</p>
+
+        <div style="background: linear-gradient(135deg, #6366f1, #a855f7); padding: 20px; border-radius: 8px; margin: 20px 0;">
+            <p style="color: white; margin: 0; font-size: 14px;">📋 <strong>Task:</strong></p>
+            <p style="color: white; margin: 5px 0 15px 0; font-size: 18px; font-weight: bold;">{{ task_title }}</p>
+            <p style="color: white; margin: 0; font-size: 14px;">⏰ <strong>Time Left:</strong></p>
+            <p style="color: white; margin: 5px 0 0 0; font-size: 18px; font-weight: bold;">{{ time_left }}</p>
+        </div>
+
+        <p style="font-size: 16px; color: #333; line-height: 1.6;">Don't forget to complete it on time!</p>
+
+        <hr style="border: none; border-top: 1px solid #eee; margin: 30px 0;">
+
+        <p style="font-size: 14px; color: #999; text-align: center;">Best regards,<br><strong>StudyCloud Team</strong></p>
+    </div>
+</body>
+</html>
+        """)
+
+# 📧 EMAIL NOTIFICATION FUNCTION
+# Pass conn (from mail.connect()) to reuse one authenticated SMTP session
+# across a batch; without it every call pays TCP + STARTTLS + AUTH again
+def send_email_notification(user_email, task_title, time_left, conn=None):
+    try:
+        msg = Message(
+            subject=f'⏰ Task Reminder: {task_title}',
+            recipients=[user_email]
+        )
+        msg.body = _EMAIL_TEXT_TMPL.render(task_title=task_title, time_left=time_left)
+        msg.html = _EMAIL_HTML_TMPL.render(task_title=task_title, time_left=time_left)
+        if conn is not None:
+            try:
+                conn.send(msg)
+            except smtplib.SMTPServerDisconnected:
+                # Gmail drops idle sessions; reopen once and retry
+                conn.host = conn.configure_host()
+                conn.send(msg)
+        else:
+            mail.send(msg)
+        print(f'✅ Email sent to {user_email} for task: {task_title}')
+        return True
+    except Exception as e:
+        print(f'❌ Email send error: {e}')
+        return False
+
+# 🔔 CHECK TASKS AND SEND NOTIFICATIONS
+def check_task_notifications():
+    try:
+        with app.app_context():
+            print('🔍 Checking for task notifications...')
+            now = datetime.utcnow()
+            
+            # Filter to the three notification windows in SQL so the sweep
+            # only transfers rows that actually need a reminder, instead of
+            # every open task every 5 minutes. The elif chain below still
+            # decides which window a row landed in.
+            due_window = db.or_(
+                db.and_(Task.notified_1day.is_(False),
+                        Task.due_date.between(now + timedelta(hours=23, minutes=50),
+                                              now + timedelta(hours=24, minutes=10))),
+                db.and_(Task.notified_1hour.is_(False),
+                        Task.due_date.between(now + timedelta(minutes=50),
+                                              now + timedelta(hours=1, minutes=10))),
+                db.and_(Task.notified_10min.is_(False),
+                        Task.due_date.between(now + timedelta(minutes=5),
+                                              now + timedelta(minutes=15))),
+            )
+            # Eager-join the owner so the loop below never lazy-loads a User
+            # per task (1 query instead of 1+N), and skip the unused
+            # description/created_at columns
+            tasks = Task.query.options(
+                joinedload(Task.owner),
+                load_only(Task.title, Task.due_date, Task.user_id,
+                          Task.notified_1day, Task.notified_1hour, Task.notified_10min),
+            ).filter(Task.status == 'incomplete', due_window).all()
+
+            if not tasks:
+                return
+
+            # One SMTP session for the whole batch. If the server is down we
+            # still record the in-app notifications; the per-task send just
+            # fails fast like before.
+            conn = None
+            try:
+                conn = mail.connect()
+                conn.__enter__()
+            except Exception as e:
+                print(f'❌ SMTP connection failed: {e}')
+
+            for task in tasks:
+                try:
+                    user = task.owner
+
+                    time_until_due = task.due_date - now
+                    
+                    # 1 DAY BEFORE (24 hours)
+                    if not task.notified_1day and timedelta(hours=23, minutes=50) <= time_until_due <= timedelta(hours=24, minutes=10):
+                        send_email_notification(user.email, task.title, "1 day", conn)
+                        notif = Notification(
+                            user_id=user.id,
+                            task_id=task.id,
+                            message=f"📋 Task '{task.title}' is due in 1 day!"
+                        )
+                        db.session.add(notif)
+                        task.notified_1day = True
+                        print(f'📧 1 day notification sent for: {task.title}')
+                    
+                    # 1 HOUR BEFORE
+                    elif not task.notified_1hour and timedelta(minutes=50) <= time_until_due <= timedelta(hours=1, minutes=10):
+                        send_email_notification(user.email, task.title, "1 hour", conn)
+                        notif = Notification(
+                            user_id=user.id,
+                            task_id=task.id,
+                            message=f"⚠️ Task '{task.title}' is due in 1 hour!"
+                        )
+                        db.session.add(notif)
+                        task.notified_1hour = True
+                        print(f'📧 1 hour notification sent for: {task.title}')
+                    
+                    # 10 MINUTES BEFORE
+                    elif not task.notified_10min and timedelta(minutes=5) <= time_until_due <= timedelta(minutes=15):
+                        send_email_notification(user.email, task.title, "10 minutes", conn)
+                        notif = Notification(
+                            user_id=user.id,
+                            task_id=task.id,
+                            message=f"🚨 Task '{task.title}' is due in 10 minutes!"
+                        )
+                        db.session.add(notif)
+                        task.notified_10min = True
+                        print(f'📧 10 min notification sent for: {task.title}')
+                    
+                    db.session.commit()
+                except Exception as e:
+                    print(f'❌ Error processing task {task.id}: {e}')
+                    db.session.rollback()
+                    continue
+
+            if conn is not None:
+                conn.__exit__(None, None, None)
+
+    except Exception as e:
+        print(f'❌ Scheduler error: {e}')
+
+# 🕐 SCHEDULER - Run every 5 minutes
+scheduler = BackgroundScheduler()
+# The sweep runs on the scheduler's own thread, so SMTP waits never block a
+# web worker; coalesce/max_instances keep slow SMTP batches from stacking up
+# behind each other when a run overshoots the interval
+scheduler.add_job(func=check_task_notifications, trigger="interval", minutes=5,
+                  coalesce=True, max_instances=1, misfire_grace_time=60)
+scheduler.start()
+
+# Shut down the scheduler when exiting the app
+atexit.register(lambda: scheduler.shutdown())
+
+@login_manager.user_loader
+def load_user(user_id):
+    # Memoize on g so repeated current_user access within one request costs
+    # at most one PK lookup (which itself hits the identity map first).
+    # Deliberately request-scoped only: a cross-request TTL cache would hand
+    # detached instances to a fresh session and serve stale points/badges.
+    user = g.get('_current_user')
+    if user is None:
+        try:
+            user = db.session.get(User, int(user_id))
+        except (TypeError, ValueError):
+            return None
+        g._current_user = user
+    return user
+
+# Health check (REQUIRED FOR RENDER)
+@app.route('/health')
+@cache.cached(timeout=60)
+def health():
+    return jsonify({"status": "ok"}), 200
+
+# Routes
+@app.route('/')
+def index():
+    if current_user.is_authenticated:
+        return redirect(url_for('dashboard'))
+    return redirect(url_for('auth'))
+
+@app.route('/auth')
+def auth():
+    if current_user.is_authenticated:
+        return redirect(url_for('dashboard'))
+    return render_template('auth.html')
+
+@app.route('/register', methods=['POST'])
+def register():
+    username = request.form.get('username')
+    email = request.form.get('email')
+    password = request.form.get('password')
+    
+    user = User(username=username, email=email, points=0, level=1)
+    hash_executor.submit(user.set_password, password).result()
+    db.session.add(user)
+
+    # Let the UNIQUE constraints do the duplicate check — no pre-SELECTs,
+    # and no race between check and insert
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        if 'username' in str(e.orig):
+            flash('Username already exists!', 'danger')
+        else:
+            flash('Email already registered!', 'danger')
+        return redirect(url_for('auth'))
+
+    flash('Registration successful! Please login.', 'success')
+    return redirect(url_for('auth'))
+
+@app.route('/login', methods=['POST'])
+def login():
+    username = request.form.get('username')
+    # A missing password must still flash the normal failure message, so
+    # fall back to '' rather than handing None to the hash verifiers
+    password = request.form.get('password') or ''
+
+    # Two-column fetch: no ORM hydration and none of the selectin
+    # badge/task loads on the auth path; the full user is only loaded
+    # once the password checks out
+    row = db.session.execute(
+        db.select(User.id, User.password_hash)
+        .where(User.username == username)).first()
+
+    if row:
+        ok, upgraded_hash = hash_executor.submit(
+            _verify_password, row.password_hash, password).result()
+    else:
+        try:
+            hash_executor.submit(password_hasher.verify, _DUMMY_HASH, password).result()
+        except VerifyMismatchError:
+            pass
+        ok = False
+
+    if ok:
+        user = db.session.get(User, row.id)
+        if upgraded_hash is not None:
+            user.password_hash = upgraded_hash
+            db.session.commit()
+        login_user(user)
+        return redirect(url_for('dashboard'))
+    else:
+        flash('Invalid username or password!', 'danger')
+        return redirect(url_for('auth'))
+
+@app.route('/dashboard')
+@login_required
+def dashboard():
+    filter_status = request.args.get('status', 'all')
+    filter_priority = request.args.get('priority', 'all')
+    page = request.args.get('page', 1, type=int)
+    # Resolve the proxy once; every current_user access walks a LocalProxy
+    uid = current_user.id
+
+    # One aggregate row serves double duty: the sidebar counters and the
+    # conditional-GET state. Unchanged revisits skip the task query and the
+    # render. Never answer 304 while flash messages are pending.
+    last_change, all_count, complete_count = db.session.execute(
+        STMT_DASH_STATE, {'uid': uid}).one()
+    incomplete_count = all_count - complete_count
+
+    etag = hashlib.md5(
+        f'{uid}:{filter_status}:{filter_priority}:{page}:'
+        f'{last_change}:{all_count}:{current_user.points}'.encode()
+    ).hexdigest()
+    if etag in request.if_none_match and not session.get('_flashes'):
+        return '', 304
+
+    # The etag encodes everything the page depends on, so it doubles as the
+    # server-side cache key: a task change produces a new key and the stale
+    # entry simply ages out. The rendered HTML embeds this session's CSRF
+    # token, so the key is additionally session-scoped — a shared entry
+    # would hand one session's token to another and 400 its form posts.
+    # Pages with pending flashes bypass the cache in both directions.
+    has_flashes = bool(session.get('_flashes'))
+    cache_key = f"dash:{etag}:{session.get('csrf_token', '')}"
+    if not has_flashes:
+        cached_html = cache.get(cache_key)
+        if cached_html is not None:
+            response = make_response(cached_html)
+            response.set_etag(etag)
+            return response
+
+    # Look up the pre-specialized statement for this filter combination
+    # (unknown filter values fall back to the unfiltered view) and paginate
+    # instead of materializing the user's entire task history
+    stmt = DASH_STMTS.get((filter_status, filter_priority), DASH_STMTS[('all', 'all')])
+    pagination = db.paginate(stmt.params(uid=uid),
+                             page=page, per_page=25, error_out=False)
+    tasks = pagination.items
+
+
+    user_badges = current_user.get_badges()
+    
+    html = render_template('dashboard.html',
+                         tasks=tasks,
+                         pagination=pagination,
+                         filter_status=filter_status,
+                         filter_priority=filter_priority,
+                         all_count=all_count,
+                         complete_count=complete_count,
+                         incomplete_count=incomplete_count,
+                         user_badges=user_badges)
+    if not has_flashes:
+        # Re-read the token: rendering mints it on a session's first page
+        cache.set(f"dash:{etag}:{session.get('csrf_token', '')}", html, timeout=30)
+    response = make_response(html)
+    response.set_etag(etag)
+    return response
+
+@app.route('/add_task', methods=['POST'])
+@login_required
+def add_task():
+    title = request.form.get('title')
+    description = request.form.get('description')
+    priority = request.form.get('priority', 'medium')
+    due_date_str = request.form.get('due_date')
+    
+    # Parse due date - NOW SUPPORTS TIME!
+    # fromisoformat (C-implemented, and on 3.11+ it takes both YYYY-MM-DD
+    # and YYYY-MM-DDTHH:MM) is much cheaper than two strptime attempts
+    due_date = None
+    if due_date_str:
+        try:
+            due_date = datetime.fromisoformat(due_date_str)
+        except ValueError:
+            pass
+    
+    # Write-only path: a Core INSERT skips ORM construction, identity-map
+    # bookkeeping and the post-commit attribute refresh. Nothing here reads
+    # the new row back, so no RETURNING is needed either.
+    db.session.execute(db.insert(Task).values(
+        title=title, description=description, priority=priority,
+        due_date=due_date, user_id=current_user.id))
+    db.session.commit()
+    
+    flash('Task added successfully!', 'success')
+    return redirect(url_for('dashboard'))
+
+@app.route('/toggle_task/<int:task_id>', methods=['POST'])
+@login_required
+def toggle_task(task_id):
+    # Fetch only the two columns the handler needs; the ownership check is
+    # part of the same WHERE, so other users' task ids just 404
+    row = db.session.execute(
+        db.select(Task.status, Task.priority)
+        .where(Task.id == task_id, Task.user_id == current_user.id)
+    ).first()
+    if row is None:
+        abort(404)
+
+    new_status = 'complete' if row.status == 'incomplete' else 'incomplete'
+    db.session.execute(
+        db.update(Task)
+        .where(Task.id == task_id, Task.user_id == current_user.id)
+        .values(status=new_status)
+    )
+
+    if new_status == 'complete':
+        points, message = PRIORITY_POINTS.get(row.priority, PRIORITY_POINTS['low'])
+        flash(message, 'success')
+        current_user.add_points(points)
+
+        # The denormalized counter replaces a COUNT query on the write path
+        current_user.completed_count += 1
+
+        badge_name = BADGE_THRESHOLDS.get(current_user.completed_count)
+        if badge_name:
+            current_user.add_badge(badge_name)
+            flash(f'🏆 New Badge: {badge_name}!', 'success')
+    else:
+        current_user.completed_count = max(0, current_user.completed_count - 1)
+        flash('Task marked as incomplete.', 'info')
+
+    db.session.commit()
+    return redirect(url_for('dashboard'))
+
+@app.route('/delete_task/<int:task_id>', methods=['POST'])
+@login_required
+def delete_task(task_id):
+    # Authorization and deletion in one DELETE statement; RETURNING tells us
+    # whether the task existed and whether the completed counter must drop
+    row = db.session.execute(
+        db.delete(Task)
+        .where(Task.id == task_id, Task.user_id == current_user.id)
+        .returning(Task.status)
+    ).first()
+    if row is None:
+        db.session.rollback()
+        abort(404)
+    if row.status == 'complete':
+        current_user.completed_count = max(0, current_user.completed_count - 1)
+    db.session.commit()
+
+    flash('Task deleted successfully!', 'success')
+    return redirect(url_for('dashboard'))
+
+# 🔔 NOTIFICATION ROUTES
+@app.route('/notifications')
+@login_required
+def notifications():
+    # Explicit bounded query instead of materializing the whole history
+    page = request.args.get('page', 1, type=int)
+    notifs_pagination = Notification.query.filter_by(user_id=current_user.id) \
+        .order_by(Notification.timestamp.desc()) \
+        .paginate(page=page, per_page=50, error_out=False)
+    return render_template('notifications.html',
+                           notifications=notifs_pagination.items,
+                           pagination=notifs_pagination)
+
+@app.route('/api/notifications/count')
+@login_required
+def notification_count():
+    uid = current_user.id
+    # One aggregate feeds both the payload and the conditional-GET state,
+    # so an unchanged poll costs a header-only 304 instead of a JSON body
+    count, last_unread_id = db.session.execute(
+        db.select(func.count(Notification.id), func.max(Notification.id))
+        .where(Notification.user_id == uid, Notification.read.is_(False))
+    ).one()
+    etag = f'{uid}-{last_unread_id}-{count}'
+    if etag in request.if_none_match:
+        return '', 304
+    response = jsonify({'count': count})
+    response.set_etag(etag)
+    # Let the browser de-duplicate poll bursts (multiple tabs, rapid
+    # navigation) without a round trip; private keeps shared caches out
+    response.headers['Cache-Control'] = 'private, max-age=10'
+    response.vary.add('Cookie')
+    return response
+
+@app.route('/api/notifications/recent')
+@login_required
+def recent_notifications():
+    # Core column select (no ORM hydration) + orjson for the poll endpoint
+    rows = db.session.execute(
+        STMT_RECENT_NOTIFICATIONS, {'uid': current_user.id}).all()
+    payload = orjson.dumps({
+        'notifications': [{
+            'id': row.id,
+            'message': row.message,
+            'timestamp': row.timestamp.strftime('%Y-%m-%d %H:%M'),
+            'read': row.read
+        } for row in rows]
+    })
+    return Response(payload, mimetype='application/json')
+
+@app.route('/notifications/mark_read/<int:notif_id>')
+@login_required
+def mark_notification_read(notif_id):
+    notif = Notification.query.get_or_404(notif_id)
+    if notif.user_id == current_user.id:
+        notif.read = True
+        db.session.commit()
+    return redirect(url_for('notifications'))
+
+@app.route('/notifications/mark_all_read')
+@login_required
+def mark_all_read():
+    db.session.execute(
+        db.update(Notification)
+        .where(Notification.user_id == current_user.id, Notification.read.is_(False))
+        .values(read=True))
+    db.session.commit()
+    return redirect(url_for('notifications'))
+
+@app.route('/analytics')
+@login_required
+def analytics():
+    now = datetime.utcnow()
+    uid = current_user.id
+
+    # All seven counters in one aggregate pass in the database instead of
+    # loading every task row and re-scanning it in Python. The template
+    # only renders the numbers, so no task list is fetched at all.
+    (total_tasks, completed, incomplete,
+     high_priority, medium_priority, low_priority, overdue) = db.session.query(
+        func.count(Task.id),
+        func.count(case((Task.status == 'complete', 1))),
+        func.count(case((Task.status == 'incomplete', 1))),
+        func.count(case((Task.priority == 'high', 1))),
+        func.count(case((Task.priority == 'medium', 1))),
+        func.count(case((Task.priority == 'low', 1))),
+        func.count(case(((Task.due_date < now) & (Task.status == 'incomplete'), 1))),
+    ).filter(Task.user_id == uid).one()
+
+    user_badges = current_user.get_badges()
+
+    # Same trick as the dashboard: the key encodes everything the page
+    # shows, so unchanged numbers reuse the cached render and changed
+    # numbers produce a new key (no explicit busting)
+    cache_key = 'analytics:' + hashlib.md5(
+        f'{uid}:{total_tasks}:{completed}:{high_priority}:'
+        f'{medium_priority}:{overdue}:{len(user_badges)}'.encode()
+    ).hexdigest()
+    has_flashes = bool(session.get('_flashes'))
+    if not has_flashes:
+        cached_html = cache.get(cache_key)
+        if cached_html is not None:
+            return cached_html
+
+    html = render_template('analytics.html',
+                         total_tasks=total_tasks,
+                         completed=completed,
+                         incomplete=incomplete,
+                         high_priority=high_priority,
+                         medium_priority=medium_priority,
+                         low_priority=low_priority,
+                         overdue=overdue,
+                         user_badges=user_badges)
+    if not has_flashes:
+        cache.set(cache_key, html, timeout=60)
+    return html
+
+@app.route('/admin')
+@login_required
+def admin():
+    if not hmac.compare_digest(current_user.username, 'admin'):
+        flash('Access denied! Admin only.', 'danger')
+        return redirect(url_for('dashboard'))
+    
+    users_page = request.args.get('users_page', 1, type=int)
+    tasks_page = request.args.get('tasks_page', 1, type=int)
+
+    # Stat cards come from aggregates, not from materializing every row
+    total_users = db.session.scalar(db.select(func.count(User.id)))
+    total_tasks, completed_tasks = db.session.execute(
+        db.select(func.count(Task.id),
+                  func.count(case((Task.status == 'complete', 1))))).one()
+
+    # Both tables paginate so memory and render time stay bounded no matter
+    # how large the database grows. selectinload/joinedload keep the
+    # template's user.tasks / task.owner accesses from lazy-loading per row.
+    users_pagination = User.query.options(selectinload(User.tasks)) \
+        .order_by(User.id).paginate(page=users_page, per_page=50, error_out=False)
+    tasks_pagination = Task.query.options(joinedload(Task.owner)) \
+        .order_by(Task.created_at.desc(), Task.id.desc()) \
+        .paginate(page=tasks_page, per_page=50, error_out=False)
+
+    response = make_response(render_template('admin.html',
+                         users=users_pagination.items,
+                         tasks=tasks_pagination.items,
+                         users_pagination=users_pagination,
+                         tasks_pagination=tasks_pagination,
+                         total_users=total_users,
+                         total_tasks=total_tasks,
+                         completed_tasks=completed_tasks))
+    # Conditional GET: unchanged admin lists revalidate to a 304
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('auth'))
+
+if __name__ == '__main__':
+    # Local development only — production runs under gunicorn (see Procfile)
+    # and creates the schema via `flask init-db` in the release phase
+    with app.app_context():
+        db.create_all()
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1')
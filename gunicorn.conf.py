@@ -0,0 +1,14 @@
+"""Gunicorn hooks for running with --preload.
+
+The master imports app.py once (workers then share its read-only memory
+copy-on-write), but any database connections opened during import must
+not be reused across the fork boundary.
+"""
+
+
+def post_fork(server, worker):
+    from app import app, db
+    with app.app_context():
+        # Drop inherited pooled connections without closing the master's
+        # sockets; each worker builds its own pool on first checkout
+        db.engine.dispose(close=False)
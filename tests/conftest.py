@@ -0,0 +1,55 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Point the app at a throwaway database before it is imported
+os.environ['DATABASE_URL'] = 'sqlite:///' + tempfile.mkstemp(suffix='.db')[1]
+
+import pytest
+from sqlalchemy import event
+
+from app import app as flask_app, db
+
+
+@pytest.fixture()
+def app():
+    flask_app.config['WTF_CSRF_ENABLED'] = False
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+    yield flask_app
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture()
+def count_queries(app):
+    """Context manager that records every SQL statement sent to the engine.
+
+    Use it to assert a query budget per request so template or relationship
+    changes that reintroduce N+1 patterns fail loudly::
+
+        with count_queries() as queries:
+            client.get('/dashboard')
+        assert len(queries) <= 6
+    """
+    with app.app_context():
+        engine = db.engine
+
+    @contextmanager
+    def _count():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return _count
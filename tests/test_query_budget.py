@@ -0,0 +1,25 @@
+def _login(client):
+    client.post('/register', data={
+        'username': 'budget', 'email': 'budget@example.com', 'password': 'pw'})
+    client.post('/login', data={'username': 'budget', 'password': 'pw'})
+
+
+def test_dashboard_query_budget(client, count_queries):
+    _login(client)
+    for i in range(3):
+        client.post('/add_task', data={
+            'title': f'task {i}', 'description': 'x', 'priority': 'high'})
+    client.get('/dashboard')  # consume pending flashes
+
+    # Fresh render: current user, aggregate state, task page + count, badges.
+    # A regression to per-row lazy loads pushes this well past the budget.
+    with count_queries() as queries:
+        response = client.get('/dashboard')
+    assert response.status_code == 200
+    assert len(queries) <= 5, queries
+
+    # Cached revisit: user load (plus its selectin badge load) and the
+    # aggregate state row — no task page query, no render
+    with count_queries() as queries:
+        client.get('/dashboard')
+    assert len(queries) <= 3, queries